@@ -6,8 +6,15 @@
 """
 
 import logging
+import queue
 import signal
 import subprocess
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 from .util import Timer, time_elapsed
 from .iterators import TaskViewIterator, EndlessViewIterator
@@ -15,8 +22,8 @@ from .iterators import TaskViewIterator, EndlessViewIterator
 from couchdb.http import ResourceConflict
 from stopit import ThreadingTimeout
 
-logging.basicConfig(level=logging.INFO)
-log = logging.getLogger(__name__)
+from .picaslogger import picaslogger as log
+
 stopit_logger = logging.getLogger('stopit')
 stopit_logger.setLevel(logging.ERROR)
 
@@ -26,15 +33,23 @@ class AbstractRunActor(object):
     Executor class to be overwritten in the client implementation.
     """
 
-    def __init__(self, db, iterator=None, view='todo', token_reset_values=[0, 0], **view_params):
+    # number of times a conflicting task save is retried before giving up
+    MAX_SAVE_RETRIES = 5
+    # number of task saves that may be in flight before _run blocks
+    MAX_PENDING_SAVES = 4
+
+    def __init__(self, db, iterator=None, view='todo', token_reset_values=[0, 0],
+                 bulk_save_size=1, **view_params):
         """
         @param database: the database to get the tasks from.
         @param token_reset_values: values to use in the token when PiCaS is terminated, defaults to values of 'todo' ([0,0])
+        @param bulk_save_size: number of completed tasks to accumulate before
+               committing them in a single _bulk_docs call, defaults to 1
+               (save each task individually)
         """
         if db is None:
             raise ValueError("Database must be initialized")
         self.db = db
-        self.iterator = iterator
         self.token_reset_values = token_reset_values
 
         # current task is needed to reset it when PiCaS is killed
@@ -43,6 +58,16 @@ class AbstractRunActor(object):
         self.subprocess = None
         self.tasks_processed = 0
 
+        # saves are pipelined: a small pool commits task N while task N+1 runs
+        self._save_executor = ThreadPoolExecutor(max_workers=2)
+        self._pending_saves = deque()
+        self.bulk_save_size = bulk_save_size
+        self._save_buffer = []
+
+        # signal handling is deferred while a DB critical section runs
+        self._in_critical_section = False
+        self._deferred_signal = None
+
         if iterator is None:
             self.iterator = TaskViewIterator(self.db, view, **view_params)
         else:
@@ -57,35 +82,133 @@ class AbstractRunActor(object):
         self.current_task = task
 
         try:
-            with ThreadingTimeout(timeout, swallow_exc=False) as context_manager:
-                self.process_task(task)
-        except Exception as ex:
-            msg = ("Exception {0} occurred during processing: {1}"
-                   .format(type(ex), ex))
-            task.error(msg, exception=ex)
-            log.info(msg)
-
-        if context_manager.state == context_manager.TIMED_OUT:
-            msg = ("Token execution exceeded timeout limit of {0} seconds".format(timeout))
-            log.info(msg)
+            try:
+                with ThreadingTimeout(timeout, swallow_exc=False) as context_manager:
+                    self.process_task(task)
+            except Exception as ex:
+                msg = ("Exception {0} occurred during processing: {1}"
+                       .format(type(ex), ex))
+                task.error(msg, exception=ex)
+                log.info(msg)
+
+            if context_manager.state == context_manager.TIMED_OUT:
+                msg = ("Token execution exceeded timeout limit of {0} seconds".format(timeout))
+                log.info(msg)
+
+            if self.bulk_save_size > 1:
+                # accumulate completed tasks and commit a full window in a
+                # single _bulk_docs call
+                self._save_buffer.append(task)
+                if len(self._save_buffer) >= self.bulk_save_size:
+                    with self._defer_signals():
+                        self._flush_save_buffer()
+            else:
+                # commit the task in the background so the next task can start
+                # processing while this save is in flight
+                self._pending_saves.append(
+                    self._save_executor.submit(self._save_task, task))
+                while len(self._pending_saves) >= self.MAX_PENDING_SAVES:
+                    self._pending_saves.popleft().result()
+        finally:
+            # cleanup_run always runs once prepare_run has, even when the
+            # save step raises
+            self.cleanup_run()
 
-        while True:
+        self.tasks_processed += 1
+
+    def _save_task(self, task):
+        """
+        Save a task, retrying with the current revision on conflict.
+        """
+        for attempt in range(self.MAX_SAVE_RETRIES):
             try:
                 self.db.save(task)
                 break
             except ResourceConflict:
                 # simply overwrite changes - model results are more
-                # important
-                new_task = self.db.get(task.id)
-                task['_rev'] = new_task.rev
+                # important. Only the current _rev is fetched (a HEAD
+                # request), so retrying costs a single extra round-trip.
+                task['_rev'] = self.db.get_rev(task.id)
+                # back off exponentially to avoid live-lock under contention
+                time.sleep(0.1 * 2 ** attempt)
+        else:
+            log.info(f"Unable to save task {task.id} after {self.MAX_SAVE_RETRIES} conflicts")
 
-        self.cleanup_run()
-        self.tasks_processed += 1
+    def _flush_save_buffer(self):
+        """
+        Commit the buffered tasks in one _bulk_docs call. Tasks that were
+        rejected because of a conflict fall back to the single conflict-aware
+        save.
+        """
+        if not self._save_buffer:
+            return
+        tasks, self._save_buffer = self._save_buffer, []
+        saved = self.db.save_documents(tasks)
+        for task, success in zip(tasks, saved):
+            if not success:
+                self._save_task(task)
+
+    def _flush_saves(self):
+        """
+        Block until all in-flight and buffered task saves have completed.
+        """
+        while self._pending_saves:
+            self._pending_saves.popleft().result()
+        self._flush_save_buffer()
+
+    @contextmanager
+    def _defer_signals(self):
+        """
+        Mark a DB critical section. A termination signal arriving while it
+        runs is recorded instead of interrupting the operation mid-save; the
+        handler is invoked once the section has completed.
+        """
+        self._in_critical_section = True
+        try:
+            yield
+        finally:
+            self._in_critical_section = False
+        if self._deferred_signal is not None:
+            signum, self._deferred_signal = self._deferred_signal, None
+            self.handler(signum, None)
+
+    def _prefetch(self, prefetch_size):
+        """
+        Generator that claims tasks ahead of the main loop.
+
+        A producer thread consumes the iterator and keeps up to
+        prefetch_size claimed tasks in a bounded queue, so that fetching
+        and locking the next token overlaps with processing the current
+        one. Note that when the loop stops early, tasks that were already
+        claimed by the producer stay locked until they are scrubbed.
+
+        @param prefetch_size: maximum number of tasks to claim ahead.
+        """
+        tasks = queue.Queue(maxsize=prefetch_size)
+        sentinel = object()
+
+        def producer():
+            try:
+                for task in self.iterator:
+                    tasks.put(task)
+            finally:
+                tasks.put(sentinel)
 
-    def run(self, max_token_time=None):
+        threading.Thread(target=producer, daemon=True).start()
+        while True:
+            task = tasks.get()
+            if task is sentinel:
+                break
+            yield task
+
+    def run(self, max_token_time=None, prefetch_size=None):
         """
         Run method of the actor, executes the application code by iterating
         over the available tasks in CouchDB.
+
+        @param max_token_time: maximum time to run a single token before stopping
+        @param prefetch_size: number of tasks to claim ahead of the main loop,
+               overlapping the next view query with task execution (optional)
         """
         # The error handler for when SLURM (or other scheduler / user) kills PiCaS, to reset the
         # token back to 'todo' state (or other state defined through the token_reset_values)
@@ -93,12 +216,17 @@ class AbstractRunActor(object):
 
         self.time = Timer()
         self.prepare_env()
+        tasks = self._prefetch(prefetch_size) if prefetch_size else self.iterator
         try:
-            for task in self.iterator:
+            for task in tasks:
                 self._run(task, timeout=max_token_time)
                 self.current_task = None  # set to None so the handler leaves the token alone when picas is killed
         finally:
-            self.cleanup_env()
+            try:
+                with self._defer_signals():
+                    self._flush_saves()
+            finally:
+                self.cleanup_env()
 
     def handler(self, signum, frame):
         """
@@ -110,6 +238,18 @@ class AbstractRunActor(object):
         @param signum: signal to listen to and act upon
         @param frame: stack frame, defaults to None, see https://docs.python.org/3/library/signal.html#signal.signal
         """
+        if self._in_critical_section:
+            # running the reset save now would re-enter the DB client
+            # mid-operation; defer until the critical section completes
+            self._deferred_signal = signum
+            return
+
+        # snapshot the token state upfront: the run loop or a save worker may
+        # clear or replace current_task while the slow subprocess shutdown
+        # below is still running
+        task = self.current_task
+        reset_values = self.token_reset_values
+
         log.info(f'PiCaS shutting down, called with signal {signum}')
 
         # gracefully kill the process running token code, it needs to stop before we update the token state
@@ -117,19 +257,22 @@ class AbstractRunActor(object):
             log.info('Terminating execution of token')
             self.subprocess.terminate()
             try:
-                self.subprocess.communicate(timeout=30)  # wait 30 seconds for termination, value chosen to allow complex processes to stop
+                self.subprocess.wait(timeout=30)  # wait 30 seconds for termination, value chosen to allow complex processes to stop
             except subprocess.TimeoutExpired:
                 log.info('Killing subprocess')
                 self.subprocess.kill()
-                self.subprocess.communicate()
+                self.subprocess.wait()
+
+        # wait for in-flight saves, so the reset save below cannot race them
+        self._flush_saves()
 
         # update the token state, if reset vaue is None, do nothing.
-        if self.current_task and self.token_reset_values is not None:
+        if task and reset_values is not None:
             # scrub goes first, as it reset lock and done to defaults, which could be overwritten below
-            self.current_task.scrub()
-            self.current_task['lock'] = self.token_reset_values[0]
-            self.current_task['done'] = self.token_reset_values[1]
-            self.db.save(self.current_task)
+            task.scrub()
+            task['lock'] = reset_values[0]
+            task['done'] = reset_values[1]
+            self.db.save(task)
 
         self.cleanup_env()
         exit(0)
@@ -178,7 +321,7 @@ class RunActor(AbstractRunActor):
     """
 
     def run(self, max_token_time=None, max_total_time=None, max_tasks=None, max_scrub=0,
-            stop_function=None, **stop_function_args):
+            prefetch_size=None, stop_function=None, **stop_function_args):
         """
         Run method of the actor, executes the application code by iterating
         over the available tasks in CouchDB, including stop logic. The stop
@@ -189,6 +332,8 @@ class RunActor(AbstractRunActor):
         @param max_total_time: maximum time to run picas before stopping
         @param max_tasks: number of tasks that are performed before stopping
         @param max_scrub: number of times a token can be reset ('scrubbed') after failing
+        @param prefetch_size: number of tasks to claim ahead of the main loop,
+               overlapping the next view query with task execution (optional)
         @param stop_function: custom function to stop the execution, must return bool
         @param stop_function_args: kwargs to supply to stop_function
         """
@@ -203,17 +348,25 @@ class RunActor(AbstractRunActor):
             self.iterator.stop_callback = time_elapsed
             self.iterator.stop_callback_args = {"timer": timer, "max": max_total_time}
 
+        tasks = self._prefetch(prefetch_size) if prefetch_size else self.iterator
+        # hoist attribute lookups out of the hot loop
+        run_task = self._run
+        db = self.db
+        elapsed = timer.elapsed
         try:
-            for task in self.iterator:
-                self._run(task, timeout=max_token_time)
+            for task in tasks:
+                run_task(task, timeout=max_token_time)
 
-                logging.debug("Tasks executed: ", self.tasks_processed)
+                log.debug("Tasks executed: %s", self.tasks_processed)
 
                 # Scrub the token if it failed, scrubbing puts it back in 'todo' state
                 if (task['scrub_count'] < max_scrub) and (task['exit_code'] != 0):
                     log.info(f"Scrubbing token {task['_id']}")
-                    task.scrub()
-                    self.db.save(task)
+                    with self._defer_signals():
+                        # wait for the pipelined save so the task _rev is current
+                        self._flush_saves()
+                        task.scrub()
+                        db.save(task)
 
                 if (stop_function is not None and stop_function(**stop_function_args)):
                     break
@@ -223,9 +376,13 @@ class RunActor(AbstractRunActor):
                     break
 
                 # break if max_total_time is exceeded (needed because only EndlessViewIterator has stop callback)
-                if max_total_time is not None and timer.elapsed() > max_total_time:
+                if max_total_time is not None and elapsed() > max_total_time:
                     break
 
                 self.current_task = None  # set to None so the handler leaves the token alone when picas is killed
         finally:
-            self.cleanup_env()
+            try:
+                with self._defer_signals():
+                    self._flush_saves()
+            finally:
+                self.cleanup_env()
@@ -7,7 +7,6 @@
 """
 
 import random
-import sys
 
 import couchdb
 from couchdb.design import ViewDefinition
@@ -85,6 +84,18 @@ class CouchDB:
             raise ValueError(id + " is not a document ID in the database")
         return Document(data)
 
+    def get_rev(self, id):
+        """
+        Get only the current revision of a document.
+
+        Uses a HEAD request, which returns the revision in the ETag header,
+        so the document body is never transferred.
+        :param id: _id string of the document
+        :return: the current _rev string of the document
+        """
+        _, headers, _ = self.db.resource.head(id)
+        return headers['ETag'].strip('"')
+
     def get_single_from_view(self, view, window_size=1, **view_params):
         """Get a document from the specified view.
         :param view: the view to get the document from.
@@ -94,8 +105,17 @@ class CouchDB:
         one record within that set, which is randomly selected, is returned.
         :return: a CouchDB document.
         """
+        # for a single-row window the document is fetched inline, saving a
+        # round-trip; for larger windows only the skinny view rows are
+        # transferred and the one selected document is fetched separately
+        if window_size == 1:
+            view_params.setdefault('include_docs', True)
         view = self.view(view, limit=window_size, **view_params)
         row = random.choice(view.rows)
+        if view_params.get('include_docs'):
+            if row.doc is None:
+                raise ValueError(row.id + " is not a document ID in the database")
+            return Document(row.doc)
         return self.get(row.id)
 
     def view(self, view, design_doc="Monitor", **view_params):
@@ -188,11 +208,10 @@ class CouchDB:
                 self.delete(doc)
             except ResourceConflict as ex:
                 picaslogger.info(
-                    f"Could not delete document {doc.id} (rev {doc.rev}) due to resource conflict: {str(ex)}",
-                    file=sys.stderr)
+                    f"Could not delete document {doc.id} (rev {doc.rev}) due to resource conflict: {str(ex)}")
                 result[i] = False
             except Exception as ex:
-                picaslogger.info(f"Could not delete document {str(doc)}: {str(ex)}", file=sys.stderr)
+                picaslogger.info(f"Could not delete document {str(doc)}: {str(ex)}")
                 result[i] = False
         return result
 
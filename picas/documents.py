@@ -26,6 +26,11 @@ class Document:
         # Data is not from the database
         if '_rev' not in data:
             data = merge_dicts(base, data)
+            # copy containers taken over from the shared base defaults, so
+            # documents cannot mutate each other's defaults
+            for key, value in base.items():
+                if data[key] is value and isinstance(value, (dict, list)):
+                    data[key] = value.copy()
 
         self.doc = data
 
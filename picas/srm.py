@@ -7,8 +7,10 @@
 
 
 # Python imports
+import random
+import shutil
 import threading
-import logging
+import time
 import queue
 from os import path
 
@@ -18,13 +20,13 @@ from .picaslogger import picaslogger
 
 def download(remotefile):
     """Download file"""
-    logging.debug(f"Downloading: {remotefile}")
+    picaslogger.debug(f"Downloading: {remotefile}")
     raise NotImplementedError("Download function not implemented yet. Use SRMClient class.")
 
 
 def upload(localfile):
     """Upload file"""
-    logging.debug(f"Uploading: {localfile}")
+    picaslogger.debug(f"Uploading: {localfile}")
     raise NotImplementedError("Upload function not implemented yet. Use SRMClient class.")
 
 
@@ -50,6 +52,15 @@ def download_many(files, poolsize=10, logger=None):
         d.join(1)
 
 
+def _local_path(url):
+    """Return the filesystem path for a file:// URL, or None otherwise.
+    @param url: the URL to inspect.
+    """
+    if url.startswith("file://"):
+        return url[len("file://"):]
+    return None
+
+
 def upload_many(files, poolsize=10):
     """Upload multiple files"""
     raise NotImplementedError("upload_many function not implemented. Use SRMClient class.")
@@ -71,7 +82,7 @@ class Downloader(threading.Thread):
         threading.Thread.__init__(self)
         self.q = q
         if logger is None:
-            self.logger = logging.getLogger('SRM')
+            self.logger = picaslogger
         else:
             self.logger = logger
         self.srm = SRMClient(self.logger)
@@ -89,8 +100,12 @@ class Downloader(threading.Thread):
                 try:
                     self.srm.download(f)
                     done = True
-                except Exception():
+                except Exception as ex:
                     count += 1
+                    self.logger.warning("Download retry %d for %s: %s", count, f, ex)
+                    # back off exponentially with jitter instead of
+                    # immediately retrying a struggling SRM
+                    time.sleep(min(60., 2 ** count) + random.uniform(0., 1.))
 
             self.q.task_done()
 
@@ -104,12 +119,12 @@ class SRMClient:
     """Helper class to easily down- and upload files to/from SRM.
     """
 
-    def __init__(self, logger, host="srm://srm.grid.sara.nl/"):
+    def __init__(self, logger=None, host="srm://srm.grid.sara.nl/"):
         """Init function.
-        @param logger: Python logger.
+        @param logger: Python logger. Default: the shared picaslogger.
         @param host: host address of the SRM. Default: srm://srm.grid.sara.nl/"
         """
-        self.logger = logger
+        self.logger = logger if logger is not None else picaslogger
         self.srm_host = host
 
     def remote_exists(self, loc):
@@ -141,6 +156,15 @@ class SRMClient:
         """
         srm_file = path.join(srm_dir, path.basename(local_file))
         srm_url = self.srm_host + srm_file
+
+        local_dst = _local_path(srm_url)
+        if local_dst is not None:
+            # local staging area: copy in-process, shutil uses the
+            # os.sendfile fast path instead of spawning srmcp
+            self.logger.info("Copying to local staging area: " + local_dst)
+            shutil.copyfile(local_file, local_dst)
+            return srm_url
+
         if check:
             if not path.isfile(local_file):
                 raise EnvironmentError(10, "File not found.", local_file)
@@ -166,6 +190,15 @@ class SRMClient:
         """
         local_file = path.join(local_dir, path.basename(srm_file))
         srm_url = self.srm_host + srm_file
+
+        local_src = _local_path(srm_url)
+        if local_src is not None:
+            # local staging area: copy in-process, shutil uses the
+            # os.sendfile fast path instead of spawning srmcp
+            self.logger.info("Copying from local staging area: " + local_src)
+            shutil.copyfile(local_src, local_file)
+            return local_file
+
         if check and not self.remote_exists(srm_file):
             raise EnvironmentError(10, "File not found.", srm_url)
 
@@ -6,55 +6,54 @@
 """
 
 
-import threading
-import logging
-import queue
+import asyncio
+import random
+import time
 
 from picas.srm import SRMClient
 from .picaslogger import picaslogger
 
 
+async def download_async(files, concurrency=32):
+    """Download files concurrently through asyncio.
+    The SRM transfer itself is a synchronous srmcp subprocess call, so each
+    download is pushed off the event loop with asyncio.to_thread; the
+    semaphore caps how many transfers run at once.
+    @param files: dict whose values are the SRM paths to download.
+    @param concurrency: maximum number of simultaneous downloads. Default: 32.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def download_one(f):
+        async with semaphore:
+            return await asyncio.to_thread(_download_one, f)
+
+    await asyncio.gather(*[download_one(v) for v in files.values()])
+    picaslogger.info("Download work done")
+
+
 def download(files, threads=10):
-    """Download wrapper"""
-    q = queue.Queue()
-    for _, v in files.items():
-        q.put(v)
-
-    thread_pool = []
-    for _ in range(threads):
-        d = Downloader(q)
-        d.start()
-        thread_pool.append(d)
-
-    q.join()
-    picaslogger.info("Download work done, joining threads")
-    for d in thread_pool:
-        picaslogger.info(f"Joining: {d.ident}")
-        d.join(1)
-
-
-class Downloader(threading.Thread):
-    """Download class using SRM"""
-
-    def __init__(self, q):
-        threading.Thread.__init__(self)
-        self.q = q
-        self.logger = logging.getLogger('Pindel')
-        self.srm = SRMClient(self.logger)
-        self.daemon = False
-
-    def run(self):
-        while not self.q.empty():
-            f = self.q.get()
-            count = 0
-            done = False
-            while (count < 10 and not done):
-                try:
-                    self.srm.download(f)
-                    done = True
-                except Exception():
-                    count += 1
-            if count > 9:
-                raise EnvironmentError("Download failed.")
-            self.q.task_done()
-        picaslogger.info("Exiting while loop, thread should close itself...")
+    """Download wrapper, synchronous shim around download_async.
+    @param files: dict whose values are the SRM paths to download.
+    @param threads: number of concurrent downloads. Default: 10.
+    """
+    asyncio.run(download_async(files, concurrency=threads))
+
+
+def _download_one(f, retries=10):
+    """Download a single file, retrying on failure.
+    Retries back off exponentially with jitter, so parallel workers do not
+    hammer the SRM in lockstep after a shared failure.
+    @param f: SRM path of the file to download.
+    @param retries: number of attempts before giving up. Default: 10.
+    @return: location of the downloaded file.
+    """
+    srm = SRMClient()
+    for attempt in range(retries):
+        try:
+            return srm.download(f)
+        except Exception as ex:
+            picaslogger.warning("Download retry %d for %s: %s", attempt + 1, f, ex)
+            if attempt < retries - 1:
+                time.sleep(min(60., 2 ** attempt) + random.uniform(0., 1.))
+    raise EnvironmentError("Download failed of: " + f)
@@ -3,7 +3,6 @@
 """
 
 import time
-from copy import deepcopy
 
 
 def time_elapsed(timer, max=30.):
@@ -18,10 +17,14 @@ def time_elapsed(timer, max=30.):
 
 
 def merge_dicts(dict1, dict2):
-    """merge two dicts"""
-    merge = deepcopy(dict1)
-    merge.update(dict2)
-    return merge
+    """Merge two dicts into a new dict, values in dict2 take precedence.
+
+    The merge is shallow: values are not copied, so callers that merge in
+    shared mutable defaults must copy those themselves. For read-only
+    merges, collections.ChainMap(dict2, dict1) gives the same view without
+    building a new dict at all.
+    """
+    return {**dict1, **dict2}
 
 
 def seconds():
@@ -30,18 +33,19 @@ def seconds():
 
 
 class Timer:
-    """Timer class"""
+    """Timer class, based on the monotonic clock so that wall-clock
+    adjustments (NTP, DST) cannot skew elapsed times."""
 
     def __init__(self):
-        self.t = time.time()
+        self.t = time.monotonic()
 
     def elapsed(self):
         """Get elapsed since class init"""
-        return time.time() - self.t
+        return time.monotonic() - self.t
 
     def reset(self):
         """Reset timer"""
-        new_t = time.time()
+        new_t = time.monotonic()
         diff = new_t - self.t
         self.t = new_t
         return diff
@@ -15,9 +15,9 @@ from picas.iterators import EndlessViewIterator
 
 class ExampleRun(RunActor):
 
-    def __init__(self, callback):
+    def __init__(self, callback, **actor_args):
         db = MockDB()
-        super(ExampleRun, self).__init__(db)
+        super(ExampleRun, self).__init__(db, **actor_args)
         self.callback = callback
 
     def process_task(self, task):
@@ -59,6 +59,26 @@ class TestRun(unittest.TestCase):
         runner.run()
         self.assertEqual(self.count, len(MockDB.TASKS))
 
+    def test_run_prefetch(self):
+        """
+        Test that prefetching tasks through the producer thread still
+        processes every task exactly once.
+        """
+        self.count = 0
+        runner = ExampleRun(self._callback)
+        runner.run(prefetch_size=2)
+        self.assertEqual(self.count, len(MockDB.TASKS))
+
+    def test_run_bulk_save(self):
+        """
+        Test that bulk saving processes and commits every task.
+        """
+        self.count = 0
+        runner = ExampleRun(self._callback, bulk_save_size=2)
+        runner.run()
+        self.assertEqual(self.count, len(MockDB.TASKS))
+        self.assertEqual(len(runner.db.saved), len(MockDB.TASKS))
+
     def test_stop_max_tasks(self):
         """
         Test to stop after 1 task is performed.
@@ -185,3 +205,20 @@ class TestHandler(unittest.TestCase):
 
         self.assertEqual(self.actor.current_task['lock'], self.lock_code)
         self.assertEqual(self.actor.current_task['done'], self.done_code)
+
+    def test_signal_deferred_in_critical_section(self):
+        """
+        Test that a signal arriving during a DB critical section is deferred
+        until the section completes, then handled as usual.
+        """
+        self.actor.setup_handler()
+
+        with pytest.raises(SystemExit) as handler_exit_code:
+            with self.actor._defer_signals():
+                # inside the critical section the handler only records the signal
+                self.actor.handler(signal.SIGTERM, None)
+                self.assertEqual(self.actor._deferred_signal, signal.SIGTERM)
+        self.assertEqual(handler_exit_code.value.code, 0)
+
+        self.assertEqual(self.actor.current_task['lock'], self.lock_code)
+        self.assertEqual(self.actor.current_task['done'], self.done_code)
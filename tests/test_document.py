@@ -86,6 +86,13 @@ class TestTask(unittest.TestCase):
         self.assertEqual(self.task['done'], 0)
         self.assertEqual(self.task['scrub_count'], 2)
 
+    def test_base_not_shared(self):
+        other = Task({'_id': test_other_id})
+        self.task.error("some message")
+        self.task.input['x'] = 1
+        self.assertEqual(other['error'], [])
+        self.assertEqual(other.input, {})
+
     def test_error(self):
         self.task.error("some message")
         self.assertEqual(self.task['lock'], 99)
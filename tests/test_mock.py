@@ -41,6 +41,11 @@ class MockDB(object):
 
         return doc
 
+    def save_documents(self, docs):
+        for doc in docs:
+            self.save(doc)
+        return [True] * len(docs)
+
 
 class MockEmptyDB(MockDB):
     TASKS = []